@@ -1,14 +1,19 @@
 import os
+import time
+import asyncio
+import torch
 import joblib
+import numpy as np
 import contextlib 
+from curl_cffi import requests as curl_requests
 from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from starlette.responses import Response
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
-from datetime import datetime
 
 # Importações dos artefatos
-from app.config.settings import SCALER_PATH, MODEL_DIR
-from app.model.lstm_light_module import LSTMLightModule
+from app.config.settings import SCALER_PATH, SCALER_PARAMS_PATH, MODEL_DIR, SCRIPTED_MODEL_PATH, TIME_STEP, BATCH_MAX_SIZE
+from app.model.lstm_light_module import LSTMLightModule, select_quantized_engine
 from app.api.router import prediction_router
 from app.config import security
 # Importa o módulo de estado que contém as variáveis globais e métricas
@@ -24,29 +29,65 @@ async def lifespan_startup_shutdown(app: FastAPI):
     print("Iniciando carregamento do Scaler e Modelo PyTorch...")
 
     # --- LÓGICA DE STARTUP ---
-    # Carregar Scaler
+    # Carregar Scaler (apenas os coeficientes do MinMax, aplicados sem o sklearn)
     try:
-        # Atribui o objeto carregado ao módulo state
-        state.SCALER = joblib.load(SCALER_PATH)
-        print(f"Scaler carregado com sucesso de: {SCALER_PATH}")
+        if os.path.exists(SCALER_PARAMS_PATH):
+            params = np.load(SCALER_PARAMS_PATH)
+            scale, minimo = params['scale'], params['min']
+            print(f"Scaler carregado com sucesso de: {SCALER_PARAMS_PATH}")
+        else:
+            # Artefatos gerados antes do .npz: extrai os coeficientes do MinMaxScaler serializado
+            scaler = joblib.load(SCALER_PATH)
+            scale, minimo = scaler.scale_, scaler.min_
+            print(f"Scaler carregado com sucesso de: {SCALER_PATH}")
+
+        # Atribui os coeficientes ao módulo state
+        state.SCALE = float(scale[0])
+        state.MIN = float(minimo[0])
     except Exception as e:
-        print(f"ERRO: Falha ao carregar o Scaler de {SCALER_PATH}. {e}")
+        print(f"ERRO: Falha ao carregar o Scaler de {SCALER_PARAMS_PATH} / {SCALER_PATH}. {e}")
         raise RuntimeError("API não pode iniciar sem o scaler.")
 
-    # Encontrar e Carregar o Modelo PyTorch Lightning (.ckpt)
+    # Sessão HTTP única para o yfinance (o yfinance exige sessões curl_cffi)
+    state.YF_SESSION = curl_requests.Session(impersonate="chrome")
+
+    # Encontrar e Carregar o Modelo (TorchScript exportado no treino ou checkpoint PyTorch Lightning)
     try:
-        model_files = [f for f in os.listdir(MODEL_DIR) if f.endswith(".ckpt")]
-        if not model_files:
+        # Pega o melhor/último arquivo modificado (passada única; DirEntry reaproveita o stat)
+        with os.scandir(MODEL_DIR) as entries:
+            latest = max(
+                (e for e in entries if e.name.endswith(".ckpt")),
+                key=lambda e: e.stat().st_mtime,
+                default=None
+            )
+        if latest is None:
              raise FileNotFoundError(f"Nenhum arquivo .ckpt encontrado em {MODEL_DIR}")
-        
-        # Pega o melhor/último arquivo modificado
-        state.BEST_MODEL_PATH = os.path.join(MODEL_DIR, sorted(model_files, key=lambda x: os.path.getmtime(os.path.join(MODEL_DIR, x)), reverse=True)[0])
-
-        # Carrega o LSTMLightModule (hparams usados para reconstruir a arquitetura)
-        hparams = {'input_size': 1, 'hidden_size': 50, 'dropout_rate': 0.2, 'learning_rate': 0.001}
-        # Atribui o objeto ao módulo state
-        state.MODEL = LSTMLightModule.load_from_checkpoint(state.BEST_MODEL_PATH, hparams=hparams)
-        state.MODEL.eval() # Coloca o modelo em modo de avaliação
+
+        # Backend dos operadores int8 (necessário tanto para carregar quanto para quantizar)
+        select_quantized_engine()
+
+        if os.path.exists(SCRIPTED_MODEL_PATH) and os.path.getmtime(SCRIPTED_MODEL_PATH) >= latest.stat().st_mtime:
+            # Modelo de inferência exportado pelo train.py (já quantizado, compilado e congelado)
+            state.BEST_MODEL_PATH = SCRIPTED_MODEL_PATH
+            state.SCRIPTED = torch.jit.load(SCRIPTED_MODEL_PATH)
+        else:
+            state.BEST_MODEL_PATH = latest.path
+
+            # Carrega o LSTMLightModule (hparams usados para reconstruir a arquitetura)
+            hparams = {'input_size': 1, 'hidden_size': 50, 'dropout_rate': 0.2, 'learning_rate': 0.001}
+            # Atribui o objeto ao módulo state
+            state.MODEL = LSTMLightModule.load_from_checkpoint(state.BEST_MODEL_PATH, hparams=hparams)
+            state.MODEL.eval() # Coloca o modelo em modo de avaliação
+
+            # Quantização dinâmica int8 + TorchScript congelado (o checkpoint fp32 permanece como fonte)
+            state.SCRIPTED = state.MODEL.export_inference_model()
+
+        # Buffer de entrada reutilizado pelos lotes de previsão
+        state.INPUT_BUF = torch.zeros((BATCH_MAX_SIZE, TIME_STEP, 1), dtype=torch.float32)
+
+        # Warmup: primeira execução dispara a otimização do grafo antes da 1ª requisição
+        with torch.inference_mode():
+            state.SCRIPTED(state.INPUT_BUF[:1])
         
         print(f"Modelo PyTorch carregado com sucesso de: {state.BEST_MODEL_PATH}")
         print("API pronta para receber requisições.")
@@ -54,15 +95,30 @@ async def lifespan_startup_shutdown(app: FastAPI):
     except Exception as e:
         print(f"ERRO: Falha ao carregar o Modelo de {MODEL_DIR}. {e}")
         raise RuntimeError("API não pode iniciar sem o modelo.")
+
+    # Micro-batching: task em background que agrupa as previsões pendentes
+    state.PREDICTION_QUEUE = asyncio.Queue()
+    state.BATCH_TASK = asyncio.create_task(prediction_router.batch_inference_worker())
         
     # O 'yield' sinaliza que o startup terminou e a API está pronta para servir
     yield
     
     # --- LÓGICA DE SHUTDOWN (Executado quando o servidor desliga) ---
     print("Desligando e limpando recursos da API...")
+    state.BATCH_TASK.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await state.BATCH_TASK
+
     # Limpa as referências no módulo state
+    state.BATCH_TASK = None
+    state.PREDICTION_QUEUE = None
     state.MODEL = None
-    state.SCALER = None
+    state.SCRIPTED = None
+    state.INPUT_BUF = None
+    state.SCALE = None
+    state.MIN = None
+    state.YF_SESSION.close()
+    state.YF_SESSION = None
 
 
 # --- 2. Inicialização do FastAPI (Passando o Lifespan) ---
@@ -70,7 +126,8 @@ app = FastAPI(
     title="API PETR4",
     version="1.0.0",
     description="API para previsão de preços de fechamento da PETR4 usando modelo LSTM.",
-    lifespan=lifespan_startup_shutdown
+    lifespan=lifespan_startup_shutdown,
+    default_response_class=ORJSONResponse # Serialização JSON via orjson
 )
 
 
@@ -80,16 +137,19 @@ async def prometheus_middleware(request: Request, call_next):
     """
     Middleware que rastreia o tempo e o status de cada requisição.
     """
-    start_time = datetime.now()
-    endpoint = request.url.path
+    start_time = time.perf_counter()
     method = request.method
     
     response = await call_next(request)
     
-    end_time = datetime.now()
-    latency = (end_time - start_time).total_seconds()
+    latency = time.perf_counter() - start_time
+
+    # Usa o template da rota declarada (não a URL bruta) para limitar a cardinalidade dos labels;
+    # caminhos sem rota (ex: 404) são agrupados em "unknown"
+    route = request.scope.get("route")
+    endpoint = route.path if route is not None else "unknown"
     
-    if endpoint != '/metrics':
+    if endpoint not in ('/metrics', 'unknown'):
         # Usa as métricas do módulo state
         state.REQUEST_LATENCY.labels(method=method, endpoint=endpoint).observe(latency)
     
@@ -1,69 +1,230 @@
 import torch
 import time
+import asyncio
 import logging
+import threading
+import numpy as np
 import yfinance as yf
 from fastapi import APIRouter, HTTPException, Depends
 from app.schemas.prediction_schema import PredictionResponse 
 from datetime import datetime, timedelta
-from app.config.settings import TIME_STEP, TICKER 
+from app.config.settings import TIME_STEP, TICKER, YF_CACHE_DIR, PRICE_CACHE_TTL, BATCH_MAX_SIZE, BATCH_WINDOW
 from app.config.security import verify_token
 
-# Importa o módulo de estado que contém as variáveis globais carregadas (MODEL, SCALER)
+# Importa o módulo de estado que contém as variáveis globais carregadas (modelo e coeficientes do scaler)
 from app.api import state 
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Cache persistente de fusos horários do yfinance (evita uma consulta extra ao Yahoo)
+yf.set_tz_cache_location(YF_CACHE_DIR)
+
+# Cache em memória dos preços recentes: (ticker, end_date) -> (instante, preços, última data)
+_PRICE_CACHE: dict[tuple[str, str], tuple[float, np.ndarray, str]] = {}
+_PRICE_CACHE_LOCK = threading.Lock()
+# A sessão curl_cffi (state.YF_SESSION) não é thread-safe: um download por vez
+_YF_SESSION_LOCK = asyncio.Lock()
+
 # --- REQUISITO 5: Métricas ---
 
-def get_ml_artifacts():
+def get_ml_artifacts() -> None:
     """
-    Dependência para injetar o Modelo e o Scaler no endpoint.
-    Verifica o estado do modelo carregado no hook lifespan.
+    Dependência que garante que o Modelo e o Scaler foram carregados no hook lifespan.
+    Os artefatos em si são repassados ao worker de lote pelo batch_inference_worker.
+
+    Raises:
+        HTTPException: 503 se o modelo ou os coeficientes do scaler não estiverem carregados.
     """
-   
     # Verifica o estado do módulo
-    if state.MODEL is None or state.SCALER is None:
+    if state.SCRIPTED is None or state.SCALE is None:
         raise HTTPException(status_code=503, detail="Serviço indisponível. Modelo ou Scaler não carregados.")
-    
-    # Retorna o modelo e o scaler carregados (apenas se não forem None)
-    return state.MODEL, state.SCALER
 
-@router.post("/predict/petr4", response_model=PredictionResponse)
-def predict_price(artifacts: tuple = Depends(get_ml_artifacts), token: str = Depends(verify_token)):
+def _get_cached_prices(key: tuple[str, str]) -> tuple[np.ndarray, str] | None:
     """
-    Endpoint responsável por prever o preço de fechamento do próximo pregão (D+1)
-    da ação PETR4.SA. A previsão utiliza o modelo LSTM treinado e a janela temporal
-    de 60 dias.
+    Consulta o cache de preços recentes.
+
+    Args:
+        key (tuple[str, str]): Chave (ticker, end_date).
+
+    Returns:
+        tuple[np.ndarray, str] | None: (preços recentes, data do último preço), ou None se
+            a entrada não existir ou estiver expirada (mais antiga que PRICE_CACHE_TTL).
     """
-    start_time = time.time()
-    
-    # 1. Obtenção de Artefatos (Injetados)
-    model, scaler = artifacts
-    
-    # 2. Busca de Dados Históricos (yfinance)
-    end_date = datetime.now().strftime('%Y-%m-%d')
-    start_date = (datetime.now() - timedelta(days=100)).strftime('%Y-%m-%d')
-    
-    try:
-        data = yf.download(TICKER, start=start_date, end=end_date)
-        
+    with _PRICE_CACHE_LOCK:
+        cached = _PRICE_CACHE.get(key)
+    if cached is not None and time.monotonic() - cached[0] < PRICE_CACHE_TTL:
+        return cached[1], cached[2]
+    return None
+
+async def get_recent_prices(start_date: str, end_date: str) -> tuple[np.ndarray, str]:
+    """
+    Retorna os últimos TIME_STEP preços de fechamento do TICKER e a data do último pregão.
+    O resultado é mantido em cache por PRICE_CACHE_TTL segundos, pois a janela
+    só muda uma vez por pregão. O download (I/O bloqueante) roda fora do event loop,
+    um por vez: requisições simultâneas com cache expirado aguardam o mesmo download.
+
+    Args:
+        start_date (str): Data inicial da consulta (YYYY-MM-DD).
+        end_date (str): Data final da consulta (YYYY-MM-DD).
+
+    Returns:
+        tuple[np.ndarray, str]: (preços recentes, data do último preço).
+
+    Raises:
+        HTTPException: Se não houver dados suficientes para montar a janela.
+    """
+    key = (TICKER, end_date)
+
+    cached = _get_cached_prices(key)
+    if cached is not None:
+        return cached
+
+    async with _YF_SESSION_LOCK:
+        # Single-flight: enquanto esta requisição aguardava o lock, outra pode ter
+        # baixado e armazenado a mesma janela (ex: rajada após o TTL expirar)
+        cached = _get_cached_prices(key)
+        if cached is not None:
+            return cached
+
+        data = await asyncio.to_thread(yf.download, TICKER, start=start_date, end=end_date, session=state.YF_SESSION)
+
         if data.empty or len(data) < TIME_STEP:
             raise HTTPException(
                 status_code=400,
                 detail=f"Não foi possível obter os últimos {TIME_STEP} preços de fechamento (Close) para {TICKER}."
             )
-            
+
         recent_prices = data['Close'].tail(TIME_STEP).values
         ultima_data = data.index[-1].strftime("%Y-%m-%d")
-        
+
         if len(recent_prices) != TIME_STEP:
             raise HTTPException(
                 status_code=400,
                 detail=f"Dados insuficientes. Encontrados apenas {len(recent_prices)} dias úteis, mas {TIME_STEP} são necessários."
             )
 
+        # Armazena ainda dentro do lock, para que as requisições em espera encontrem o resultado
+        with _PRICE_CACHE_LOCK:
+            # Descarta entradas de dias anteriores antes de armazenar a nova
+            _PRICE_CACHE.clear()
+            _PRICE_CACHE[key] = (time.monotonic(), recent_prices, ultima_data)
+
+    return recent_prices, ultima_data
+
+def run_batch_inference(
+    model: torch.jit.ScriptModule,
+    input_buf: torch.Tensor,
+    scale: float,
+    minimo: float,
+    windows: list[np.ndarray],
+) -> np.ndarray:
+    """
+    Escala um lote de janelas de preços, executa um único forward e desnormaliza as previsões.
+    Função síncrona (CPU-bound), executada em thread pelo batch_inference_worker.
+
+    Args:
+        model (torch.jit.ScriptModule): Modelo TorchScript carregado no lifespan.
+        input_buf (torch.Tensor): Buffer de entrada pré-alocado (BATCH_MAX_SIZE, TIME_STEP, 1).
+        scale (float): Coeficiente scale_ do MinMaxScaler.
+        minimo (float): Coeficiente min_ do MinMaxScaler.
+        windows (list[np.ndarray]): Janelas com os últimos TIME_STEP preços de cada requisição.
+
+    Returns:
+        np.ndarray: Preços previstos (R$), um por janela, na mesma ordem.
+    """
+    batch_size = len(windows)
+
+    # O buffer de entrada é reaproveitado entre lotes; só o worker de lote o utiliza,
+    # e ele aguarda o término de cada lote antes de montar o próximo
+    batch = input_buf[:batch_size]
+    # View NumPy sobre o mesmo bloco de memória do tensor (sem cópia)
+    buf = batch.numpy()
+
+    # Aplica o MinMax diretamente no buffer (x * scale_ + min_)
+    for i, recent_prices in enumerate(windows):
+        np.multiply(recent_prices.reshape(buf.shape[1:]), scale, out=buf[i])
+    buf += minimo
+
+    # Previsão e Desnormalização (Lógica PyTorch) com o modelo TorchScript congelado
+    with torch.inference_mode():
+        scaled_prediction_tensor = model(batch)
+        
+    scaled_prediction = scaled_prediction_tensor.cpu().numpy()
+    # Inversa do MinMax: (y - min_) / scale_
+    return ((scaled_prediction - minimo) / scale)[:, 0]
+
+async def batch_inference_worker():
+    """
+    Task de background (iniciada no lifespan) que agrupa as previsões pendentes.
+    Após a primeira requisição, aguarda até BATCH_WINDOW segundos por outras (até
+    BATCH_MAX_SIZE), executa um único forward para o lote e devolve cada resultado
+    no Future da respectiva requisição.
+    """
+    loop = asyncio.get_running_loop()
+    queue = state.PREDICTION_QUEUE
+
+    while True:
+        pending = [await queue.get()]
+        deadline = loop.time() + BATCH_WINDOW
+
+        # Coleta as requisições que chegarem dentro da janela
+        while len(pending) < BATCH_MAX_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                pending.append(await asyncio.wait_for(queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+
+        windows = [recent_prices for recent_prices, _ in pending]
+        try:
+            predictions = await asyncio.to_thread(
+                run_batch_inference, state.SCRIPTED, state.INPUT_BUF, state.SCALE, state.MIN, windows
+            )
+        except Exception as e:
+            logger.error(f"Falha na inferência do lote de {len(pending)} requisições. Erro: {str(e)}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        # Requisições canceladas (ex: cliente desconectou) já estão com o Future concluído
+        for (_, future), prediction in zip(pending, predictions):
+            if not future.done():
+                future.set_result(float(prediction))
+
+async def predict_batched(recent_prices: np.ndarray) -> float:
+    """
+    Enfileira uma janela de preços para o worker de lote e aguarda a previsão.
+
+    Args:
+        recent_prices (np.ndarray): Últimos TIME_STEP preços de fechamento.
+
+    Returns:
+        float: Preço previsto (R$) para o próximo pregão.
+    """
+    future = asyncio.get_running_loop().create_future()
+    await state.PREDICTION_QUEUE.put((recent_prices, future))
+    return await future
+
+@router.post("/predict/petr4", response_model=PredictionResponse, dependencies=[Depends(get_ml_artifacts)])
+async def predict_price(token: str = Depends(verify_token)):
+    """
+    Endpoint responsável por prever o preço de fechamento do próximo pregão (D+1)
+    da ação PETR4.SA. A previsão utiliza o modelo LSTM treinado e a janela temporal
+    de 60 dias.
+    """
+    start_time = time.time()
+    
+    # 1. Busca de Dados Históricos (yfinance)
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=100)).strftime('%Y-%m-%d')
+    
+    try:
+        recent_prices, ultima_data = await get_recent_prices(start_date, end_date)
     except Exception as e:
         logger.error(f"Falha ao buscar dados históricos via yfinance para {TICKER}. Erro: {str(e)}")
         raise HTTPException(
@@ -71,24 +232,10 @@ def predict_price(artifacts: tuple = Depends(get_ml_artifacts), token: str = Dep
             detail=f"Falha ao buscar dados históricos via yfinance para {TICKER}. Erro interno."
         )
 
-    # 3. Pré-processamento e Inferência (PyTorch)
-    
-    # Converte para NumPy (N, 1) para o scaler
-    input_data_np = recent_prices.reshape(-1, 1)
-    scaled_input_data = scaler.transform(input_data_np)
-    
-    # Converte para Tensor (1, TIME_STEP, 1) para a LSTM
-    X_input = torch.from_numpy(scaled_input_data).float().unsqueeze(0)
-    
-    # Previsão e Desnormalização (Lógica PyTorch)
-    with torch.no_grad():
-        model.eval() 
-        scaled_prediction_tensor = model(X_input)
-        
-    scaled_prediction = scaled_prediction_tensor.cpu().numpy()
-    prediction_original = scaler.inverse_transform(scaled_prediction)[0, 0]
+    # 2. Pré-processamento e Inferência (PyTorch), agrupada com outras requisições simultâneas
+    prediction_original = await predict_batched(recent_prices)
 
-    # 4. Cálculo e Log
+    # 3. Cálculo e Log
     ultimo_preco = recent_prices[-1]
     variacao_pct = ((prediction_original - ultimo_preco) / ultimo_preco) * 100
 
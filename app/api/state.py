@@ -3,7 +3,17 @@ from prometheus_client import Counter, Histogram
 # --- VARIÁVEIS GLOBAIS DE ESTADO (MODELO E SCALER) ---
 # Este módulo armazena o estado global da aplicação
 MODEL = None
-SCALER = None
+SCRIPTED = None # Versão TorchScript (congelada) do modelo, usada na inferência
+# Coeficientes do MinMaxScaler carregados na inicialização (transformação afim sem sklearn)
+SCALE = None
+MIN = None
+# Buffer de entrada (BATCH_MAX_SIZE, TIME_STEP, 1) pré-alocado e reutilizado entre lotes
+INPUT_BUF = None
+# Micro-batching: fila de requisições pendentes e a task que as processa em lote
+PREDICTION_QUEUE = None
+BATCH_TASK = None
+# Sessão HTTP compartilhada com o Yahoo Finance (reaproveita conexões TCP/TLS)
+YF_SESSION = None
 BEST_MODEL_PATH = "Aguardando Carregamento..."
 
 # --- VARIÁVEIS GLOBAIS DE MONITORAMENTO (PROMETHEUS) ---
@@ -12,7 +22,9 @@ BEST_MODEL_PATH = "Aguardando Carregamento..."
 REQUEST_LATENCY = Histogram(
     'http_request_duration_seconds', 
     'Latência das requisições HTTP', 
-    ['method', 'endpoint']
+    ['method', 'endpoint'],
+    # Poucos buckets (ms a segundos) reduzem as séries por endpoint e o custo do observe()
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, float('inf'))
 )
 REQUEST_COUNT = Counter(
     'http_requests_total', 
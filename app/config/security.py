@@ -1,5 +1,9 @@
 import os
 import jwt
+import time
+import hashlib
+import threading
+from cachetools import TTLCache
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from fastapi import APIRouter, Depends, HTTPException
 from dotenv import load_dotenv
@@ -19,6 +23,16 @@ ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Instância única do PyJWT, chave já em bytes e opções de decodificação pré-montadas
+_JWT = jwt.PyJWT()
+_KEY = SECRET_KEY.encode() if SECRET_KEY else None
+_DECODE_OPTIONS = {"require": ["exp", "sub"]}
+
+# Cache de payloads já verificados (chave: sha256 do token). Evita repetir a
+# verificação de assinatura para o mesmo token Bearer em requisições seguidas.
+_TOKEN_CACHE = TTLCache(maxsize=10_000, ttl=5)
+_TOKEN_CACHE_LOCK = threading.Lock()
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     """
     Gera um token JWT assinado com dados fornecidos e tempo de expiração.
@@ -33,7 +47,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.now(UTC) + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = _JWT.encode(to_encode, _KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
@@ -50,11 +64,25 @@ def verify_token(token: str = Depends(oauth2_scheme)):
     Raises:
         HTTPException: Se o token estiver expirado, inválido ou não contiver o campo 'sub'.
     """
+    key = hashlib.sha256(token.encode()).digest()
+    with _TOKEN_CACHE_LOCK:
+        payload = _TOKEN_CACHE.get(key)
+
+    # Cache hit: a expiração ainda precisa ser conferida
+    if payload is not None:
+        exp = payload.get("exp")
+        if exp is None or exp > time.time():
+            return payload["sub"]
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail="Token expirado")
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _JWT.decode(token, _KEY, algorithms=[ALGORITHM], options=_DECODE_OPTIONS)
         username = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail="Token inválido")
+        # Apenas verificações bem-sucedidas são armazenadas
+        with _TOKEN_CACHE_LOCK:
+            _TOKEN_CACHE[key] = payload
         return username
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail="Token expirado")
@@ -8,6 +8,8 @@ TIME_STEP = 60
 TEST_SIZE_RATIO = 0.20
 EPOCHS = 50 
 BATCH_SIZE = 64
+NUM_WORKERS = 1 # Workers do DataLoader de treino (mais workers disputam o GIL em datasets pequenos)
+EVAL_NUM_WORKERS = min(4, os.cpu_count() or 1) # Workers dos DataLoaders de validação/teste/predição
 
 # --- Hiperparâmetros do LSTM (para o LSTMLightModule) ---
 HIDDEN_SIZE = 50 
@@ -26,8 +28,26 @@ os.makedirs(ARTIFACTS_DIR, exist_ok=True)
 MODEL_DIR = os.path.join(ARTIFACTS_DIR, "checkpoints") 
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# Modelo de inferência exportado ao final do treino (TorchScript int8 congelado), usado pela API
+SCRIPTED_MODEL_PATH = os.path.join(MODEL_DIR, "lstm_petr4.pt")
+
 # Caminho para o Scaler
 SCALER_PATH = os.path.join(ARTIFACTS_DIR, "scaler.pkl")
+# Coeficientes do Scaler em NumPy (carregados pela API sem depender do sklearn/pickle)
+SCALER_PARAMS_PATH = os.path.join(ARTIFACTS_DIR, "scaler.npz")
+
+# Validade (s) das sequências X/Y salvas em disco pelo DataPipeline (evita novo download)
+SEQUENCE_CACHE_TTL = 86400
+
+# Cache local do yfinance (fusos horários dos tickers)
+YF_CACHE_DIR = os.path.join(ARTIFACTS_DIR, "yf_cache")
+os.makedirs(YF_CACHE_DIR, exist_ok=True)
+
+
+# --- Configurações da API ---
+PRICE_CACHE_TTL = 900 # Tempo (s) em que os preços baixados do yfinance são reaproveitados
+BATCH_MAX_SIZE = 32 # Máximo de requisições agrupadas em um único forward da LSTM
+BATCH_WINDOW = 0.005 # Janela (s) de espera por novas requisições antes de executar o lote
 
 
 # --- Configuração MLflow---
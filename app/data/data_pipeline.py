@@ -1,11 +1,13 @@
 import yfinance as yf
+import time
 from datetime import datetime
 import joblib
 from sklearn.preprocessing import MinMaxScaler
-from app.data.dataset import create_sequences, TimeSeriesDataset 
-from app.config.settings import TICKER, START_DATE, TIME_STEP, TEST_SIZE_RATIO, SCALER_PATH, MODEL_DIR, BATCH_SIZE 
+from app.data.dataset import create_sequences, collate_batch, TimeSeriesDataset 
+from app.config.settings import TICKER, START_DATE, TIME_STEP, TEST_SIZE_RATIO, SCALER_PATH, SCALER_PARAMS_PATH, MODEL_DIR, BATCH_SIZE, ARTIFACTS_DIR, SEQUENCE_CACHE_TTL, NUM_WORKERS, EVAL_NUM_WORKERS
 import os
 import numpy as np
+import torch
 import pytorch_lightning as pl
 from torch.utils.data import DataLoader
 
@@ -14,7 +16,7 @@ class DataPipeline(pl.LightningDataModule):
     DataPipeline (LightningDataModule) para PyTorch Lightning.
     Gerencia o download, pré-processamento, divisão e fornecimento de DataLoaders.
     """
-    def __init__(self, time_step: int, test_size_ratio: float, batch_size: int, scaler_path: str):
+    def __init__(self, time_step: int, test_size_ratio: float, batch_size: int, scaler_path: str, num_workers: int = NUM_WORKERS, eval_num_workers: int = EVAL_NUM_WORKERS):
         """
         Inicializa o DataPipeline com hiperparâmetros de dados.
 
@@ -23,12 +25,20 @@ class DataPipeline(pl.LightningDataModule):
             test_size_ratio (float): Proporção dos dados a ser usada para o conjunto de teste.
             batch_size (int): O tamanho do lote de dados para o DataLoader.
             scaler_path (str): Caminho onde o MinMaxScaler será salvo.
+            num_workers (int): Número de processos de carregamento usados pelo DataLoader de treino.
+            eval_num_workers (int): Número de processos de carregamento dos DataLoaders de validação,
+                teste e predição (sobrepõem a montagem dos lotes ao forward do modelo).
         """
         super().__init__()
         self.time_step = time_step
         self.test_size_ratio = test_size_ratio
         self.batch_size = batch_size
         self.scaler_path = scaler_path
+        self.num_workers = num_workers
+        self.eval_num_workers = eval_num_workers
+
+        # Com GPU disponível, os datasets ficam residentes nela (sem cópia H2D a cada lote)
+        self.device = torch.device('cuda') if torch.cuda.is_available() else None
         
         # Flags de estado para evitar duplicação de I/O pesado
         self.data_prepared = False 
@@ -48,25 +58,42 @@ class DataPipeline(pl.LightningDataModule):
         if self.data_prepared:
             return
 
-        print(f"--- 1. Coletando dados para {TICKER} ---")
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        
-        try:
-            dados_originais = yf.download(TICKER, start=START_DATE, end=end_date, auto_adjust=True)
-            if dados_originais.empty:
-                raise ValueError("Dataset vazio. Verifique o ticker.")
-        except Exception as e:
-            print(f"Erro na coleta de dados: {e}")
-            return
+        # --- CACHE EM DISCO: Reaproveita sequências recentes sem novo download ---
+        X_path = os.path.join(ARTIFACTS_DIR, f"seq_{TICKER}_{self.time_step}_X.npy")
+        Y_path = os.path.join(ARTIFACTS_DIR, f"seq_{TICKER}_{self.time_step}_Y.npy")
+
+        if self._sequence_cache_is_fresh(X_path, Y_path):
+            print(f"--- 1. Carregando sequências em cache para {TICKER} ---")
+            # mmap copy-on-write: abre sem copiar para a RAM e continua gravável para o torch.from_numpy
+            X = np.load(X_path, mmap_mode='c')
+            Y = np.load(Y_path, mmap_mode='c')
+            self.scaler = joblib.load(self.scaler_path)
+        else:
+            print(f"--- 1. Coletando dados para {TICKER} ---")
+            end_date = datetime.now().strftime('%Y-%m-%d')
+            
+            try:
+                dados_originais = yf.download(TICKER, start=START_DATE, end=end_date, auto_adjust=True)
+                if dados_originais.empty:
+                    raise ValueError("Dataset vazio. Verifique o ticker.")
+            except Exception as e:
+                print(f"Erro na coleta de dados: {e}")
+                return
+
+            # 1. Seleção da feature e Escalamento
+            dados_fechamento = dados_originais[['Close']]
+            # float32 desde a origem: é o dtype consumido pela LSTM (evita cópia/cast posterior)
+            precos = dados_fechamento['Close'].to_numpy(dtype=np.float32, copy=False).reshape(-1, 1)
+            # Scaler: normaliza os dados para a faixa [0, 1] e melhora o desempenho do modelo
+            self.scaler = MinMaxScaler(feature_range=(0, 1), copy=False) 
+            dados_escalonados = self.scaler.fit_transform(precos)
 
-        # 1. Seleção da feature e Escalamento
-        dados_fechamento = dados_originais[['Close']].copy()
-        # Scaler: normaliza os dados para a faixa [0, 1] e melhora o desempenho do modelo
-        self.scaler = MinMaxScaler(feature_range=(0, 1)) 
-        dados_escalonados = self.scaler.fit_transform(dados_fechamento['Close'].values.reshape(-1, 1))
+            # 2. Estruturação em Sequências (X e Y)
+            X, Y = create_sequences(dados_escalonados, self.time_step)
 
-        # 2. Estruturação em Sequências (X e Y)
-        X, Y = create_sequences(dados_escalonados, self.time_step)
+            # Salva as sequências para as próximas execuções
+            np.save(X_path, X)
+            np.save(Y_path, Y)
 
         # 3. Divisão Treino/Teste/Validação
         train_val_size = int(len(X) * (1 - self.test_size_ratio))
@@ -81,10 +108,34 @@ class DataPipeline(pl.LightningDataModule):
         os.makedirs(MODEL_DIR, exist_ok=True)
         joblib.dump(self.scaler, self.scaler_path)
         print(f"Scaler salvo em: {self.scaler_path}")
+
+        # Coeficientes do MinMax em .npz (x * scale + min), lidos pela API sem o sklearn
+        np.savez(
+            SCALER_PARAMS_PATH,
+            scale=self.scaler.scale_.astype(np.float32),
+            min=self.scaler.min_.astype(np.float32)
+        )
+        print(f"Coeficientes do Scaler salvos em: {SCALER_PARAMS_PATH}")
         
         # Marca que o I/O pesado foi concluído
         self.data_prepared = True
 
+    def _sequence_cache_is_fresh(self, X_path: str, Y_path: str) -> bool:
+        """
+        Verifica se as sequências e o scaler salvos em disco existem e têm menos de SEQUENCE_CACHE_TTL segundos.
+
+        Args:
+            X_path (str): Caminho do arquivo .npy com as entradas (X).
+            Y_path (str): Caminho do arquivo .npy com os alvos (Y).
+
+        Returns:
+            bool: True se o cache puder ser reaproveitado.
+        """
+        paths = (X_path, Y_path, self.scaler_path)
+        if not all(os.path.exists(p) for p in paths):
+            return False
+        return time.time() - min(os.path.getmtime(p) for p in paths) < SEQUENCE_CACHE_TTL
+
     def setup(self, stage: str):
         """
         Cria os objetos Dataset a partir dos dados pré-processados (sem I/O pesado).
@@ -93,29 +144,70 @@ class DataPipeline(pl.LightningDataModule):
         self.prepare_data() 
             
         if stage == 'fit':
-            self.train_dataset = TimeSeriesDataset(self.X_treino, self.Y_treino)
-            self.val_dataset = TimeSeriesDataset(self.X_val, self.Y_val)
+            self.train_dataset = TimeSeriesDataset(self.X_treino, self.Y_treino, device=self.device)
+            self.val_dataset = TimeSeriesDataset(self.X_val, self.Y_val, device=self.device)
         
-        if stage == 'test':
-            self.test_dataset = TimeSeriesDataset(self.X_teste, self.Y_teste)
+        if stage in ('test', 'predict'):
+            self.test_dataset = TimeSeriesDataset(self.X_teste, self.Y_teste, device=self.device)
+
+    def _build_dataloader(self, dataset: TimeSeriesDataset, num_workers: int, batch_size: int | None = None, persistent: bool = False) -> DataLoader:
+        """
+        Cria um DataLoader sequencial (sem shuffle) que recebe lotes já empilhados do dataset.
+        Na CPU usa workers (persistentes entre épocas, se solicitado); com o dataset
+        residente na GPU, o carregamento ocorre no processo principal.
+
+        Args:
+            dataset (TimeSeriesDataset): Dataset a ser servido.
+            num_workers (int): Número de processos de carregamento (ignorado com o dataset na GPU).
+            batch_size (int | None): Tamanho do lote. Se None, usa o batch_size do treino.
+            persistent (bool): Mantém os workers vivos entre épocas. Apenas para loaders
+                percorridos várias vezes (treino/validação); os de uma única passada os encerram ao fim.
+
+        Returns:
+            DataLoader: DataLoader configurado para o dataset.
+        """
+        # Tensores CUDA não podem ser compartilhados com workers (e já dispensam pin_memory)
+        if self.device is not None:
+            num_workers = 0
+
+        worker_kwargs = {}
+        if num_workers > 0:
+            # Workers persistentes evitam fork + pickle do dataset a cada época
+            worker_kwargs = {'persistent_workers': persistent, 'prefetch_factor': 2}
+
+        return DataLoader(
+            dataset,
+            batch_size=batch_size or self.batch_size,
+            shuffle=False,
+            collate_fn=collate_batch,
+            num_workers=num_workers,
+            **worker_kwargs
+        )
 
     def train_dataloader(self) -> DataLoader:
         """
         Retorna o DataLoader para o conjunto de treinamento.
         """
-        return DataLoader(self.train_dataset, batch_size=self.batch_size, shuffle=False)
+        return self._build_dataloader(self.train_dataset, self.num_workers, persistent=True)
 
     def val_dataloader(self) -> DataLoader:
         """
         Retorna o DataLoader para o conjunto de validação.
         """
-        return DataLoader(self.val_dataset, batch_size=self.batch_size, shuffle=False)
+        return self._build_dataloader(self.val_dataset, self.eval_num_workers, persistent=True)
 
     def test_dataloader(self) -> DataLoader:
         """
         Retorna o DataLoader para o conjunto de teste.
         """
-        return DataLoader(self.test_dataset, batch_size=self.batch_size, shuffle=False)
+        return self._build_dataloader(self.test_dataset, self.eval_num_workers)
+
+    def predict_dataloader(self) -> DataLoader:
+        """
+        Retorna o DataLoader de inferência sobre o conjunto de teste, com lotes maiores
+        que os de treino (sem gradientes, o custo de memória por lote é baixo).
+        """
+        return self._build_dataloader(self.test_dataset, self.eval_num_workers, batch_size=max(self.batch_size * 8, 512))
 
     def get_scaler(self) -> MinMaxScaler:
         """
@@ -15,29 +15,31 @@ def create_sequences(data: np.ndarray, time_step: int) -> tuple[np.ndarray, np.n
         X shape: (num_amostras, time_step, 1)
         Y shape: (num_amostras, 1)
     """
-    X, Y = [], []
+    # Converte para float32 uma única vez (dtype consumido pela LSTM); sem cópia se já for float32
+    if data.dtype != np.float32:
+        data = data.astype(np.float32)
+
     # Converte para 1D se for 2D (N, 1)
     if data.ndim > 1 and data.shape[1] == 1:
-        data = data.flatten()
-
-    for i in range(len(data) - time_step):
-        # Pega a janela de entrada
-        sequence = data[i:(i + time_step)]
-        # O alvo é o próximo passo
-        target = data[i + time_step]
-        X.append(sequence)
-        Y.append(target)
-        
-    X = np.array(X)
-    Y = np.array(Y)
-    
+        data = data.ravel()
+
+    # Série menor que a janela: nenhuma amostra possível
+    if len(data) <= time_step:
+        return np.empty((0, time_step, 1), dtype=np.float32), np.empty((0, 1), dtype=np.float32)
+
+    # Janelas deslizantes como view (sem cópia); a última janela não possui alvo
+    janelas = np.lib.stride_tricks.sliding_window_view(data, window_shape=time_step)[:-1]
+
+    # Uma única cópia contígua das janelas
+    X = np.ascontiguousarray(janelas)
+    # O alvo é o passo seguinte a cada janela (cópia própria, independente do array de entrada)
+    Y = data[time_step:].copy()
+
     # Adiciona a dimensão da feature (1) no final para o PyTorch/LSTM (batch, seq, feature)
-    if X.ndim == 2:
-        X = X.reshape(X.shape[0], X.shape[1], 1)
-        
+    X = X[..., None]
+
     # Y também deve ter 2D para ser um tensor (batch, 1)
-    if Y.ndim == 1:
-        Y = Y.reshape(-1, 1)
+    Y = Y[:, None]
         
     return X, Y
 
@@ -46,18 +48,25 @@ class TimeSeriesDataset(Dataset):
     A classe Dataset do PyTorch para lidar com dados de séries temporais.
     Converte arrays Numpy em tensores PyTorch.
     """
-    def __init__(self, X: np.ndarray, Y: np.ndarray):
+    def __init__(self, X: np.ndarray, Y: np.ndarray, device: torch.device | None = None):
         """
         Inicializa o Dataset.
 
         Args:
             X (np.ndarray): Array de entradas (features) Numpy.
             Y (np.ndarray): Array de saídas (alvos) Numpy.
+            device (torch.device | None): Dispositivo onde os tensores ficam residentes
+                (ex: GPU). Se None, permanecem na CPU.
         """
-        # Converte para float32, necessário para treinamento de DL
+        # Converte para float32, necessário para treinamento de DL (sem cópia se já for float32)
         self.X = torch.from_numpy(X).float()
         self.Y = torch.from_numpy(Y).float()
 
+        # O dataset inteiro é pequeno (< 1 MB): envia uma única vez para o dispositivo
+        if device is not None:
+            self.X = self.X.to(device)
+            self.Y = self.Y.to(device)
+
     def __len__(self) -> int:
         """
         Retorna o número total de amostras no dataset.
@@ -77,4 +86,30 @@ class TimeSeriesDataset(Dataset):
         Returns:
             tuple[torch.Tensor, torch.Tensor]: O par (X[idx], Y[idx]).
         """
-        return self.X[idx], self.Y[idx]
\ No newline at end of file
+        return self.X[idx], self.Y[idx]
+
+    def __getitems__(self, indices: list[int]) -> tuple[torch.Tensor, torch.Tensor]:
+        """
+        Retorna o lote inteiro de uma vez (busca em lote do DataLoader), já empilhado,
+        evitando montar e empilhar um par de tensores por amostra.
+
+        Args:
+            indices (list[int]): Índices das amostras do lote.
+
+        Returns:
+            tuple[torch.Tensor, torch.Tensor]: O par (X[indices], Y[indices]).
+        """
+        idx = torch.as_tensor(indices, device=self.X.device)
+        return self.X[idx], self.Y[idx]
+
+def collate_batch(batch: tuple[torch.Tensor, torch.Tensor]) -> tuple[torch.Tensor, torch.Tensor]:
+    """
+    collate_fn para o TimeSeriesDataset: o lote já chega empilhado via __getitems__.
+
+    Args:
+        batch (tuple[torch.Tensor, torch.Tensor]): O par (X, Y) do lote.
+
+    Returns:
+        tuple[torch.Tensor, torch.Tensor]: O mesmo par, sem cópia.
+    """
+    return batch
\ No newline at end of file
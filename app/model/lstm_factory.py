@@ -16,23 +16,16 @@ class LSTMFactory(nn.Module):
         """
         super().__init__()
         
-        # Camada 1: LSTM (50 unidades, return_sequences=True)
-        self.lstm1 = nn.LSTM(
+        # Camadas 1 e 2: LSTM empilhada (50 unidades cada) em um único módulo, permitindo ao
+        # cuDNN executar as duas camadas em um só kernel. O dropout entre as camadas é interno.
+        self.lstm = nn.LSTM(
             input_size=input_size, 
             hidden_size=hidden_size, 
-            num_layers=1, 
+            num_layers=2, 
+            dropout=dropout_rate,
             batch_first=True
         )
-        self.dropout1 = nn.Dropout(dropout_rate)
-        
-        # Camada 2: LSTM (50 unidades, return_sequences=False implícito no forward)
-        self.lstm2 = nn.LSTM(
-            input_size=hidden_size, 
-            hidden_size=hidden_size, 
-            num_layers=1, 
-            batch_first=True
-        )
-        self.dropout2 = nn.Dropout(dropout_rate)
+        self.dropout = nn.Dropout(dropout_rate)
         
         # Camada Densa
         self.linear = nn.Linear(hidden_size, 1)
@@ -48,15 +41,12 @@ class LSTMFactory(nn.Module):
             torch.Tensor: Previsões de saída no formato (batch_size, 1).
         """
   
-        lstm_out1, _ = self.lstm1(x)
-        lstm_out1 = self.dropout1(lstm_out1)
-        
-        lstm_out2, _ = self.lstm2(lstm_out1)
+        lstm_out, _ = self.lstm(x)
         
         # Seleciona o output do último passo da sequência
-        last_output = lstm_out2[:, -1, :] 
+        last_output = lstm_out[:, -1, :] 
         
-        last_output = self.dropout2(last_output)
+        last_output = self.dropout(last_output)
         
         output = self.linear(last_output)
         
@@ -1,3 +1,4 @@
+import copy
 import pytorch_lightning as pl
 import torch
 import torch.nn as nn
@@ -5,6 +6,13 @@ import torch.optim as optim
 from app.model.lstm_factory import LSTMFactory 
 from torchmetrics.regression import MeanAbsoluteError
 
+def select_quantized_engine():
+    """
+    Seleciona o backend FBGEMM (kernels int8 x86) para os operadores quantizados, se disponível.
+    """
+    if 'fbgemm' in torch.backends.quantized.supported_engines:
+        torch.backends.quantized.engine = 'fbgemm'
+
 class LSTMLightModule(pl.LightningModule):
     """
     Módulo de treinamento PyTorch Lightning. 
@@ -44,6 +52,38 @@ class LSTMLightModule(pl.LightningModule):
         """
         return self.model(x)
 
+    def on_load_checkpoint(self, checkpoint: dict):
+        """
+        Adapta checkpoints da arquitetura anterior (duas nn.LSTM de 1 camada: 'lstm1' e 'lstm2')
+        para a nn.LSTM única de 2 camadas, renomeando os pesos para os sufixos '_l0' e '_l1'.
+
+        Args:
+            checkpoint (dict): Checkpoint carregado pelo PyTorch Lightning.
+        """
+        state_dict = checkpoint["state_dict"]
+        for key in list(state_dict):
+            for old, layer in (("model.lstm1.", 0), ("model.lstm2.", 1)):
+                if key.startswith(old):
+                    # ex: model.lstm2.weight_ih_l0 -> model.lstm.weight_ih_l1
+                    new_key = "model.lstm." + key[len(old):].replace("_l0", f"_l{layer}")
+                    state_dict[new_key] = state_dict.pop(key)
+
+    def export_inference_model(self) -> torch.jit.ScriptModule:
+        """
+        Gera a versão de inferência (CPU) da rede: quantização dinâmica int8 das camadas
+        LSTM/Linear, compilação com TorchScript e congelamento (remove o Dropout e dobra constantes).
+        Os pesos fp32 do módulo não são alterados.
+
+        Returns:
+            torch.jit.ScriptModule: Modelo congelado pronto para inferência.
+        """
+        select_quantized_engine()
+        modelo_cpu = copy.deepcopy(self.model).cpu().eval()
+        modelo_int8 = torch.ao.quantization.quantize_dynamic(modelo_cpu, {nn.LSTM, nn.Linear}, dtype=torch.qint8, inplace=True)
+        # quantize_dynamic cria novos módulos (em modo de treino): eval() após a troca desliga o
+        # dropout entre as camadas da LSTM quantizada antes de o freeze fixar o flag
+        return torch.jit.freeze(torch.jit.script(modelo_int8.eval()))
+
     def configure_optimizers(self):
         """
         Configura e retorna o otimizador a ser usado no treinamento.
@@ -65,7 +105,8 @@ class LSTMLightModule(pl.LightningModule):
         Returns:
             torch.Tensor: O valor da função de perda de treinamento.
         """
-        return self._common_step(batch, 'train')
+        loss, _, _, _ = self._common_step(batch, 'train')
+        return loss
 
     def validation_step(self, batch, batch_idx):
         """
@@ -78,7 +119,8 @@ class LSTMLightModule(pl.LightningModule):
         Returns:
             torch.Tensor: O valor da função de perda de validação.
         """
-        return self._common_step(batch, 'val')
+        loss, _, _, _ = self._common_step(batch, 'val')
+        return loss
 
     def test_step(self, batch, batch_idx):
         """
@@ -91,16 +133,13 @@ class LSTMLightModule(pl.LightningModule):
         Returns:
             dict: Dicionário contendo a perda, MAE, previsões e valores verdadeiros.
         """
-        loss = self._common_step(batch, 'test')
-        
-        # Re-calcula y_pred para o dicionário de retorno (necessário para desnormalização)
-        x, y = batch
-        y_pred = self(x)
+        # Reaproveita as previsões do passo comum (evita um segundo forward)
+        loss, mae, y_pred, y_true = self._common_step(batch, 'test')
         
         # Loga RMSE (raiz quadrada do MSE)
         self.log('test_rmse', loss.sqrt(), on_step=False, on_epoch=True) 
         
-        return {"loss": loss, "mae": self.mae_metric.compute(), "y_pred": y_pred, "y_true": y.float().view(-1, 1)}
+        return {"loss": loss, "mae": mae, "y_pred": y_pred, "y_true": y_true}
 
     # Função auxiliar
     def _common_step(self, batch: tuple, stage: str):
@@ -112,7 +151,8 @@ class LSTMLightModule(pl.LightningModule):
             stage (str): O estágio atual ('train', 'val' ou 'test').
             
         Returns:
-            torch.Tensor: O valor da função de perda (Loss).
+            tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]: (loss, mae, y_pred, y_true)
+            do lote atual.
         """
         x, y = batch
         y_true = y.float().view(-1, 1) 
@@ -123,4 +163,4 @@ class LSTMLightModule(pl.LightningModule):
         self.log(f'{stage}_loss', loss, on_step=False, on_epoch=True)
         self.log(f'{stage}_mae', mae, on_step=False, on_epoch=True, prog_bar=True)
         
-        return loss
\ No newline at end of file
+        return loss, mae, y_pred, y_true
\ No newline at end of file
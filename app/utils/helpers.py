@@ -1,5 +1,4 @@
 import numpy as np
-from sklearn.metrics import mean_squared_error, mean_absolute_error
 import math
 
 def calculate_mape(y_true: np.ndarray, y_pred: np.ndarray) -> float:
@@ -13,14 +12,28 @@ def calculate_mape(y_true: np.ndarray, y_pred: np.ndarray) -> float:
     Returns:
         float: Erro percentual médio (%).
     """
-    y_true, y_pred = np.array(y_true), np.array(y_pred)
-    # Filtra índices onde o valor real não é zero para evitar divisão por zero
-    non_zero_indices = y_true != 0
-    if not np.any(non_zero_indices):
+    # Vetores 1D contíguos (sem cópia se já forem ndarray contíguos)
+    y_true = np.ascontiguousarray(y_true).ravel()
+    y_pred = np.ascontiguousarray(y_pred).ravel()
+
+    zeros = int(np.count_nonzero(y_true == 0))
+    if zeros == y_true.size:
         return 0.0
     
-    # Cálculo do MAPE, apenas nos índices não-zero
-    return np.mean(np.abs((y_true[non_zero_indices] - y_pred[non_zero_indices]) / y_true[non_zero_indices])) * 100
+    # Cálculo do MAPE em um único buffer (sem cópias por indexação booleana)
+    erro = np.subtract(y_true, y_pred, dtype=np.result_type(y_true, y_pred, 1.0))
+
+    # Caso comum (preços nunca são zero): divisão direta, sem máscara
+    if zeros == 0:
+        np.divide(erro, y_true, out=erro)
+        np.abs(erro, out=erro)
+        return float(erro.mean()) * 100
+
+    # Considera apenas índices onde o valor real não é zero para evitar divisão por zero
+    non_zero_indices = y_true != 0
+    np.divide(erro, y_true, out=erro, where=non_zero_indices)
+    np.abs(erro, out=erro)
+    return float(erro.sum(where=non_zero_indices)) / (y_true.size - zeros) * 100
 
 def evaluate_predictions(
     Y_teste_original: np.ndarray,
@@ -37,9 +50,18 @@ def evaluate_predictions(
         dict[str, float]: Dicionário com métricas (RMSE, MAE, MAPE).
     
     """
-    rmse = math.sqrt(mean_squared_error(Y_teste_original, Y_previsao_original))
-    mae = mean_absolute_error(Y_teste_original, Y_previsao_original)
-    mape = calculate_mape(Y_teste_original, Y_previsao_original)
+    # Vetores 1D contíguos em float64 (mesma precisão das métricas do sklearn)
+    y_true = np.asarray(Y_teste_original, dtype=np.float64).ravel()
+    y_pred = np.asarray(Y_previsao_original, dtype=np.float64).ravel()
+
+    # Um único buffer de erro, reaproveitado por RMSE e MAE
+    erro = y_pred - y_true
+    rmse = math.sqrt(np.dot(erro, erro) / erro.size)
+
+    np.abs(erro, out=erro)
+    mae = float(erro.mean())
+
+    mape = calculate_mape(y_true, y_pred)
     
     return {
         "rmse": rmse,
@@ -1,5 +1,5 @@
-import time
-import requests
+import asyncio
+import aiohttp
 import os
 from dotenv import load_dotenv
 
@@ -11,48 +11,65 @@ APP_PASS = os.getenv("APP_PASS")
 LOGIN_URL = "http://127.0.0.1:8000/login"
 PREDICT_URL = "http://127.0.0.1:8000/predict/petr4"
 
+# Requisições simultâneas disparadas a cada ciclo e intervalo (s) entre os ciclos
+CONCURRENCY = int(os.getenv("CONCURRENCY", 1))
+INTERVAL = float(os.getenv("INTERVAL", 5))
+
 data = {
     "username": APP_USER,
     "password": APP_PASS
 }
 
-def get_token():
+async def get_token(session):
     """Realiza login e retorna o token JWT."""
     try:
-        response = requests.post(url=LOGIN_URL, data=data)
-        response.raise_for_status()
+        async with session.post(LOGIN_URL, data=data) as response:
+            response.raise_for_status()
+            token = (await response.json()).get("access_token")
 
-        token = response.json().get("access_token")
         print(f"Token obtido: {token[:20]}...")
         return token
     except Exception as e:
         print("Erro ao fazer login:", e)
         return None
 
-def call_predict(token):
-    """Chama a rota de previsão usando o token JWT."""
-    headers = {"Authorization": f"Bearer {token}"}
-
+async def call_predict(session, headers):
+    """Chama a rota de previsão usando o token JWT e retorna o status HTTP."""
     try:
-        response = requests.post(PREDICT_URL, headers=headers)
-        print("Status:", response.status_code)
-        print("Resposta:", response.json())
-        print("-" * 50)
+        async with session.post(PREDICT_URL, headers=headers) as response:
+            print("Status:", response.status)
+            print("Resposta:", await response.json())
+            print("-" * 50)
+            return response.status
 
     except Exception as e:
         print("Erro ao chamar /predict:", e)
+        return None
 
+async def main():
+    """Dispara CONCURRENCY chamadas simultâneas a cada INTERVAL segundos, reutilizando a mesma sessão."""
+    print(f"Iniciando {CONCURRENCY} chamada(s) simultânea(s) a cada {INTERVAL} segundos...")
 
-if __name__ == "__main__":
-    print("Iniciando chamadas a cada 5 segundos...")
+    async with aiohttp.ClientSession() as session:
+        token = await get_token(session)
 
-    token = get_token()
+        if not token:
+            print("Não foi possível obter token. Encerrando.")
+            return
 
+        headers = {"Authorization": f"Bearer {token}"}
 
-    if not token:
-        print("Não foi possível obter token. Encerrando.")
-        exit()
+        while True:
+            status = await asyncio.gather(*(call_predict(session, headers) for _ in range(CONCURRENCY)))
 
-    while True:
-        call_predict(token)
-        time.sleep(5)
\ No newline at end of file
+            # Token expirado/inválido: faz login novamente antes do próximo ciclo
+            if 401 in status:
+                token = await get_token(session)
+                if token:
+                    headers = {"Authorization": f"Bearer {token}"}
+
+            await asyncio.sleep(INTERVAL)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
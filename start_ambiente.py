@@ -1,11 +1,13 @@
 import subprocess
 import time
 import os
+import threading
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 
 # Excemplo Docker Desktop no Windows
 DOCKER_DESKTOP_PATH = r"C:\\Program Files\\Docker\\Docker\\Docker Desktop.exe"
-TEMPO_DE_ESPERA = 20  # Tempo em segundos para esperar o Docker inicializar
+TEMPO_DE_ESPERA = 20  # Tempo máximo em segundos para esperar o Docker inicializar
 
 #URLS
 GRAFANA_URL = 'http://localhost:3000'
@@ -21,19 +23,47 @@ PROMETHEUS_CONTAINER = ["docker", "run", "-d", "--name", "prometheus_petr4","-p"
 
 UVICORN = ["uvicorn", "app.api.main:app", "--reload"]
 
+# Os contêineres sobem em paralelo: o lock evita que as mensagens de cada um se misturem
+PRINT_LOCK = threading.Lock()
+
+#Função para Verificar se o Daemon do Docker Responde
+def docker_pronto(timeout=5):
+    """Retorna True se o daemon do Docker aceita comandos (`docker info`) dentro de `timeout` segundos."""
+    try:
+        resultado = subprocess.run(["docker", "info"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
+        return resultado.returncode == 0
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return False
+
 # Função para Inciar Docker Desktop (Importante ter o app já instalado no ambiente Windows)
 def iniciar_docker_desktop():
-    """Inicia o Docker Desktop se ele estiver instalado no caminho padrão."""
+    """Inicia o Docker Desktop se ele estiver instalado no caminho padrão e aguarda o daemon responder."""
+    # Docker já em execução: nada a esperar
+    if docker_pronto():
+        print("Docker já está em execução.")
+        return True
+
     if os.path.exists(DOCKER_DESKTOP_PATH):
         print("Iniciando Docker Desktop...")
         try:
             subprocess.Popen(f'"{DOCKER_DESKTOP_PATH}"', shell=True)
-            print(f"Aguardando {TEMPO_DE_ESPERA} segundos para o Docker inicializar...")
-            time.sleep(TEMPO_DE_ESPERA)
-            return True
         except Exception as e:
             print(f"Erro ao iniciar o Docker Desktop: {e}")
             return False
+
+        # Consulta o daemon com backoff exponencial até TEMPO_DE_ESPERA segundos
+        print(f"Aguardando o Docker inicializar (até {TEMPO_DE_ESPERA} segundos)...")
+        prazo = time.monotonic() + TEMPO_DE_ESPERA
+        intervalo = 0.5
+        while time.monotonic() < prazo:
+            # A consulta também respeita o prazo (docker info pode travar durante a inicialização)
+            if docker_pronto(timeout=max(prazo - time.monotonic(), 1)):
+                return True
+            time.sleep(min(intervalo, max(prazo - time.monotonic(), 0)))
+            intervalo = min(intervalo * 2, 4)
+
+        print(f"ERRO: Docker não respondeu em {TEMPO_DE_ESPERA} segundos.")
+        return False
     else:
         print(f"ERRO: Docker Desktop não encontrado em: {DOCKER_DESKTOP_PATH}")
         return False
@@ -41,52 +71,56 @@ def iniciar_docker_desktop():
 #Função para Executar Comandos do Docker
 def executar_comando_docker(comando, nome_acao):
     """Executa um comando do Docker CLI e verifica o status."""
-    print(f"\n--- Tentando: {nome_acao} ---")
-    print(f"Executando: {' '.join(comando)}")
-    
     # Executa o comando e captura a saída e o código de retorno
-    resultado = subprocess.run(comando, capture_output=True, text=True)
+    resultado = subprocess.run(comando, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
     
-    if resultado.returncode == 0:
-        print(f"SUCESSO: {nome_acao} executado com êxito!")
-        print("Saída:", resultado.stdout.strip())
-        return True
-    else:
-        print(f"FALHA: {nome_acao} falhou (Código {resultado.returncode}).")
-        print("Erro:", resultado.stderr.strip())
-        return False
+    # Imprime o relatório do comando de uma só vez (execução paralela)
+    with PRINT_LOCK:
+        print(f"\n--- Tentando: {nome_acao} ---")
+        print(f"Executando: {' '.join(comando)}")
 
+        if resultado.returncode == 0:
+            print(f"SUCESSO: {nome_acao} executado com êxito!")
+            # Limita a saída exibida (ex: ID longo do contêiner)
+            print("Saída:", resultado.stdout.strip()[:80])
+            return True
+        else:
+            print(f"FALHA: {nome_acao} falhou (Código {resultado.returncode}).")
+            print("Erro:", resultado.stderr.strip())
+            return False
+
+#Função para Iniciar (ou Criar) um Contêiner e Abrir sua URL
+def subir_container(servico, container, comando_start, comando_run, url):
+    """Inicia o contêiner existente ou, se não existir, cria e inicia; depois abre a URL do serviço."""
+    if executar_comando_docker(comando_start, f"docker start {container}"):
+        with PRINT_LOCK:
+            print(f"\n {container.capitalize()} iniciado.")
+            print(f"Abrindo URL do {servico.upper()}")
+        webbrowser.open_new_tab(url)
+        return
+
+    with PRINT_LOCK:
+        print("\nO contêiner não existe. Criando a imagem e iniciando...")
+    if executar_comando_docker(comando_run, "docker run (Criação e Início)"):
+        with PRINT_LOCK:
+            print(f"\n {container.capitalize()} foi criado e iniciado com sucesso.")
+            print(f"Abrindo URL do {servico.upper()}")
+        webbrowser.open_new_tab(url)
+    else:
+        with PRINT_LOCK:
+            print(f"\n Falha ao criar e iniciar o contêiner {servico}.")
 
 if __name__ == "__main__":
 
     if not iniciar_docker_desktop():
         exit(1)
     
-    if executar_comando_docker(GRAFANA, "docker start grafana_petr4"):
-        print("\n Grafana_petr4 iniciado.")
-        print("Abrindo URL do GRAFANA")
-        webbrowser.open_new_tab(GRAFANA_URL)     
-    else:
-        print("\nO contêiner não existe. Criando a imagem e iniciando...")
-        if executar_comando_docker(GRAFANA_CONTAINER, "docker run (Criação e Início)"):
-            print("\n Grafana_petr4 foi criado e iniciado com sucesso.")
-            print("Abrindo URL do GRAFANA")
-            webbrowser.open_new_tab(GRAFANA_URL) 
-        else:
-            print("\n Falha ao criar e iniciar o contêiner Grafana.")
-        
-    if executar_comando_docker(PROMETHEUS, "docker start prometheus_petr4"):
-        print("\n Prometheus_petr4 iniciado.")
-        print("Abrindo URL do PROMETHEUS")
-        webbrowser.open_new_tab(PROMETHEUS_URL) 
-    else:
-        print("\nO contêiner não existe. Criando a imagem e iniciando...")
-        if executar_comando_docker(PROMETHEUS_CONTAINER, "docker run (Criação e Início)"):
-            print("\n Prometheus_petr4 foi criado e iniciado com sucesso.")
-            print("Abrindo URL do PROMETHEUS")
-            webbrowser.open_new_tab(PROMETHEUS_URL) 
-        else:
-            print("\n Falha ao criar e iniciar o contêiner Prometheus.")
+    # Grafana e Prometheus sobem em paralelo (cada um aguarda apenas o daemon do Docker)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        grafana = executor.submit(subir_container, "Grafana", "grafana_petr4", GRAFANA, GRAFANA_CONTAINER, GRAFANA_URL)
+        prometheus = executor.submit(subir_container, "Prometheus", "prometheus_petr4", PROMETHEUS, PROMETHEUS_CONTAINER, PROMETHEUS_URL)
+        grafana.result()
+        prometheus.result()
 
 
     #Iniciando Aplicaçao
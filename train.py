@@ -4,7 +4,6 @@ import numpy as np
 import torch
 import pytorch_lightning as pl
 import mlflow 
-import joblib 
 from pytorch_lightning.callbacks import ModelCheckpoint, LearningRateMonitor
 from pytorch_lightning.loggers import MLFlowLogger 
 from dotenv import load_dotenv
@@ -16,7 +15,7 @@ from app.utils.helpers import evaluate_predictions
 from app.config.settings import (
     TIME_STEP, EPOCHS, BATCH_SIZE, SCALER_PATH, 
     LEARNING_RATE, HIDDEN_SIZE, DROPOUT_RATE, 
-    TEST_SIZE_RATIO, MODEL_DIR, MLFLOW_TRACKING_URI, 
+    TEST_SIZE_RATIO, MODEL_DIR, SCRIPTED_MODEL_PATH, MLFLOW_TRACKING_URI, 
     MLFLOW_ARTIFACTS_STORE, TICKER, START_DATE
 )
 
@@ -44,6 +43,13 @@ if __name__ == "__main__":
         print(f"AMBIENTE DEV: Seed global fixada em {SEED}")
     else:
         print("AMBIENTE PRD: Seed não fixada (execuções variáveis)")
+        # cuDNN escolhe o algoritmo mais rápido para o TIME_STEP fixo (não determinístico, por isso só fora de DEV)
+        torch.backends.cudnn.benchmark = True
+
+    # TF32 nas multiplicações de matrizes em GPUs Ampere+ (precisão suficiente para a LSTM)
+    torch.set_float32_matmul_precision('high')
+    # Precisão mista bf16 quando o hardware suporta (metade da memória de ativações)
+    PRECISION = 'bf16-mixed' if torch.cuda.is_available() and torch.cuda.is_bf16_supported() else '32-true'
 
     print("\n")
     print("Iniciando Processo de Treinamento e Avaliação de Modelo LSTM (PyTorch Lightning/MLflow).\n")
@@ -99,6 +105,8 @@ if __name__ == "__main__":
     trainer = pl.Trainer(
         logger=mlflow_logger,
         max_epochs=EPOCHS,
+        precision=PRECISION,
+        enable_progress_bar=False, # Sem refresh por passo (overhead relevante em épocas curtas da LSTM)
         callbacks=[checkpoint_callback, LearningRateMonitor(logging_interval='epoch')],
     )
 
@@ -117,23 +125,32 @@ if __name__ == "__main__":
         print(f"\nMelhor modelo carregado de: {best_model_path}")
         modelo_final = LSTMLightModule.load_from_checkpoint(best_model_path, hparams=hparams)
         modelo_final.eval() 
+
+        # Inferência na GPU quando disponível (os lotes podem já estar residentes nela, ver DataPipeline)
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        modelo_final = modelo_final.to(device)
         
-        test_dataloader = data_pipeline.test_dataloader()
-        all_y_pred = []
-        all_y_true = []
+        test_dataloader = data_pipeline.predict_dataloader()
+
+        # Arrays de saída pré-alocados: cada lote é escrito na sua fatia (sem lista + concatenate)
+        n_amostras = len(test_dataloader.dataset)
+        Y_previsao = np.empty((n_amostras, 1), dtype=np.float32)
+        Y_teste = np.empty_like(Y_previsao)
+        offset = 0
         
-        with torch.no_grad(): 
+        with torch.inference_mode(): 
             for X_batch, Y_batch in test_dataloader:
-                Y_pred_batch = modelo_final(X_batch)
-                all_y_pred.append(Y_pred_batch.cpu().numpy())
-                all_y_true.append(Y_batch.cpu().numpy())
+                bsz = X_batch.size(0)
+                Y_pred_batch = modelo_final(X_batch.to(device, non_blocking=True))
+                Y_previsao[offset:offset + bsz] = Y_pred_batch.cpu().numpy()
+                Y_teste[offset:offset + bsz] = Y_batch.cpu().numpy().reshape(bsz, 1)
+                offset += bsz
 
-        Y_previsao = np.concatenate(all_y_pred)
-        Y_teste = np.concatenate(all_y_true)
-
-        scaler = joblib.load(SCALER_PATH)
-        Y_previsao_original = scaler.inverse_transform(Y_previsao)
-        Y_teste_original = scaler.inverse_transform(Y_teste)
+        # Reaproveita o scaler em memória do DataPipeline (sem reler o .pkl) e desnormaliza
+        # previsões e valores reais em uma única chamada, empilhados na mesma coluna
+        scaler = data_pipeline.get_scaler()
+        desnormalizado = scaler.inverse_transform(np.concatenate([Y_previsao, Y_teste]))
+        Y_previsao_original, Y_teste_original = np.split(desnormalizado, 2)
 
         metrics = evaluate_predictions(Y_teste_original, Y_previsao_original)
         
@@ -141,6 +158,20 @@ if __name__ == "__main__":
         print(f"RMSE (Original): {metrics['rmse']:.4f} R$")
         print(f"MAE (Original): {metrics['mae']:.4f} R$")
         print(f"MAPE (Original): {metrics['mape']:.2f} %")
+
+        # --- 8. Exportação do Modelo de Inferência (carregado pela API) ---
+        modelo_inferencia = modelo_final.export_inference_model()
+        torch.jit.save(modelo_inferencia, SCRIPTED_MODEL_PATH)
+
+        # Verificação: saída determinística (sem dropout) e idêntica após salvar/carregar o arquivo
+        amostra = torch.from_numpy(data_pipeline.X_teste[:8]).float()
+        with torch.inference_mode():
+            saida = modelo_inferencia(amostra)
+            if not torch.equal(saida, modelo_inferencia(amostra)):
+                raise RuntimeError("Modelo de inferência não determinístico (dropout ativo?).")
+            if not torch.equal(saida, torch.jit.load(SCRIPTED_MODEL_PATH)(amostra)):
+                raise RuntimeError(f"Modelo carregado de {SCRIPTED_MODEL_PATH} diverge do exportado.")
+        print(f"\nModelo de inferência (TorchScript int8) salvo em: {SCRIPTED_MODEL_PATH}")
     else:
         print("Nenhum modelo foi treinado/salvo.")
         metrics = {'rmse': test_results[0]['test_rmse'], 'mae': test_results[0]['test_mae']}